@@ -5,9 +5,18 @@ ALLOCATION_PRECISION = 1
 
 
 class AllocationGroup:
+    # 每個節點各持有一個實例，以 __slots__ 省去 __dict__
+    __slots__ = ("allocations", "fixed_items", "fixed_total")
+
     def __init__(self) -> None:
+        # allocations 的鍵只在 Node 新增/移除子節點時增減，
+        # 因此迭代順序與 Node.children 一致：values() 即是
+        # 「依子節點位置排列的比例陣列」，可與 children 平行走訪
         self.allocations: dict[str, float] = {}
         self.fixed_items: set[str] = set()
+        # 鎖定項目的比例總和，隨鎖定/解鎖增量維護，
+        # 避免每次操作都重新加總 fixed_items
+        self.fixed_total: float = 0.0
 
     def get_allocations(self) -> Mapping[str, float]:
         return self.allocations.copy()
@@ -28,11 +37,9 @@ class AllocationGroup:
             self.allocations[name] = 100.0
             return
 
-        if name not in self.allocations:
-            self.allocations[name] = 0.0
+        self.allocations.setdefault(name, 0.0)
 
-        locked_sum = sum(self.allocations.get(n, 0) for n in self.fixed_items)
-        available = 100 - locked_sum
+        available = 100 - self.fixed_total
 
         value = min(max(0.0, value), available)
         old_value = self.allocations[name]
@@ -62,7 +69,7 @@ class AllocationGroup:
         total_percentage = sum(self.allocations.values())
         if abs(total_percentage - 100) > ALLOCATION_TOLERANCE * 10:
             unlocked_items = [k for k in self.allocations if k not in self.fixed_items]
-            locked_total = sum(self.allocations.get(k, 0) for k in self.fixed_items)
+            locked_total = self.fixed_total
             if unlocked_items:
                 for name in unlocked_items:
                     self.allocations[name] = round(
@@ -85,8 +92,9 @@ class AllocationGroup:
             return
 
         if is_fixed:
-            current_locked = sum(self.allocations.get(n, 0) for n in self.fixed_items)
-            if current_locked + self.allocations[name] > 99.9:
+            if name in self.fixed_items:
+                return
+            if self.fixed_total + self.allocations[name] > 99.9:
                 return
 
             unlocked_items = [k for k in self.allocations if k not in self.fixed_items]
@@ -94,9 +102,11 @@ class AllocationGroup:
                 self.fixed_items.update(
                     [name] + [k for k in unlocked_items if k != name]
                 )
+                self.fixed_total += sum(self.allocations[k] for k in unlocked_items)
                 return
 
             self.fixed_items.add(name)
+            self.fixed_total += self.allocations[name]
             self._redistribute_allocations()
         else:
             if name in self.fixed_items:
@@ -111,15 +121,14 @@ class AllocationGroup:
                     )
                     if closest_item:
                         self.fixed_items.remove(closest_item)
+                        self.fixed_total -= self.allocations[closest_item]
                 self.fixed_items.remove(name)
+                self.fixed_total -= self.allocations[name]
                 self._normalize()
 
     def _redistribute_allocations(self) -> None:
         """重新分配未鎖定項目的百分比以滿足總和 100%"""
-        total_locked_percentage = sum(
-            self.allocations.get(name, 0) for name in self.fixed_items
-        )
-        available_percentage = 100 - total_locked_percentage
+        available_percentage = 100 - self.fixed_total
         unlocked_item_names = [k for k in self.allocations if k not in self.fixed_items]
 
         if not unlocked_item_names:
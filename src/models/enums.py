@@ -1,4 +1,5 @@
 from enum import Enum, auto
+from functools import lru_cache
 from typing import Optional
 
 
@@ -70,5 +71,7 @@ COLOR_MAP = {
 }
 
 
+@lru_cache(maxsize=None)
 def get_color(node_type: "NodeType") -> str:
+    """返回節點型別對應的顏色；同型別永遠共用同一個字串物件"""
     return COLOR_MAP.get(node_type, "#7F7F7F")
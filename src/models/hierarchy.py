@@ -13,61 +13,73 @@ if TYPE_CHECKING:
 class HierarchyManager:
     def __init__(self):
         self._hierarchy = {
-            NodeType.PORTFOLIO: {
-                NodeType.CASH,
-                NodeType.ETF,
-                NodeType.STOCK,
-                NodeType.FUND,
-                NodeType.CRYPTO,
-                NodeType.OTHER,
-            },
-            NodeType.CASH: {NodeType.CASH_SYMBOL},
-            NodeType.ETF: {NodeType.ETF_SYMBOL},
-            NodeType.STOCK: {NodeType.STOCK_SYMBOL},
-            NodeType.FUND: {NodeType.FUND_SYMBOL},
-            NodeType.CRYPTO: {NodeType.CRYPTO_SYMBOL},
-            NodeType.OTHER: {NodeType.OTHER_SYMBOL},
+            NodeType.PORTFOLIO: frozenset(
+                {
+                    NodeType.CASH,
+                    NodeType.ETF,
+                    NodeType.STOCK,
+                    NodeType.FUND,
+                    NodeType.CRYPTO,
+                    NodeType.OTHER,
+                }
+            ),
+            NodeType.CASH: frozenset({NodeType.CASH_SYMBOL}),
+            NodeType.ETF: frozenset({NodeType.ETF_SYMBOL}),
+            NodeType.STOCK: frozenset({NodeType.STOCK_SYMBOL}),
+            NodeType.FUND: frozenset({NodeType.FUND_SYMBOL}),
+            NodeType.CRYPTO: frozenset({NodeType.CRYPTO_SYMBOL}),
+            NodeType.OTHER: frozenset({NodeType.OTHER_SYMBOL}),
         }
 
-        self._terminal_types = {
-            NodeType.CASH_SYMBOL,
-            NodeType.ETF_SYMBOL,
-            NodeType.STOCK_SYMBOL,
-            NodeType.FUND_SYMBOL,
-            NodeType.CRYPTO_SYMBOL,
-            NodeType.OTHER_SYMBOL,
-        }
+        self._terminal_types = frozenset(
+            {
+                NodeType.CASH_SYMBOL,
+                NodeType.ETF_SYMBOL,
+                NodeType.STOCK_SYMBOL,
+                NodeType.FUND_SYMBOL,
+                NodeType.CRYPTO_SYMBOL,
+                NodeType.OTHER_SYMBOL,
+            }
+        )
+        # 可擁有子節點的型別集合，一次算好改用成員檢查
+        self._parent_types = frozenset(NodeType) - self._terminal_types
 
-        self._root_order = [
+        self._root_order = (
             NodeType.CASH,
             NodeType.ETF,
             NodeType.STOCK,
             NodeType.FUND,
             NodeType.CRYPTO,
             NodeType.OTHER,
-        ]
+        )
+        # 根節點標準名稱固定不變，預先展開共用同一個 tuple
+        self._root_order_names = tuple(
+            NodeType.get_chinese_name(t) for t in self._root_order
+        )
 
-    def get_valid_child_types(self, node_type: NodeType) -> set[NodeType]:
+    def get_valid_child_types(self, node_type: NodeType) -> frozenset[NodeType]:
         """返回指定節點可建立的子節點類型集合"""
-        return self._hierarchy.get(node_type, set())
+        return self._hierarchy.get(node_type, frozenset())
 
     def can_have_children(self, node_type: NodeType) -> bool:
         """判斷該節點型別是否可擁有子節點"""
-        return node_type not in self._terminal_types
+        return node_type in self._parent_types
 
-    def get_root_order(self) -> list[str]:
-        """返回根節點下標準排序名稱列表"""
-        return [NodeType.get_chinese_name(t) for t in self._root_order]
+    def get_root_order(self) -> tuple[str, ...]:
+        """返回根節點下標準排序名稱"""
+        return self._root_order_names
 
     def get_sorted_children(self, node: "Node") -> list[str]:
         """返回按順序排列的子節點名稱列表"""
         if node.is_root:
             standard_names = self.get_root_order()
             custom_names = [
-                name for name in node.children.keys() if name not in standard_names
+                name
+                for name in node.sorted_child_names()
+                if name not in standard_names
             ]
-            return standard_names + sorted(custom_names)
-        return sorted(node.children.keys())
+            return [*standard_names, *custom_names]
+        return node.sorted_child_names()
 
 
 hierarchy_manager = HierarchyManager()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
+from functools import lru_cache
+from sys import intern
 from typing import Optional, Tuple
 
 from .allocation import AllocationGroup
@@ -9,14 +12,69 @@ from .providers import asset_registry
 
 ROOT_NAME = "投資組合"
 
+# pop 的哨兵值，讓「不存在」與「值為 None」可以區分
+_MISSING = object()
+
+# 根節點下標準分類與對應型別（固定不變，模組載入時建立一次）
+_ROOT_ASSET_TYPES: dict[str, NodeType] = {
+    "現金": NodeType.CASH,
+    "ETF": NodeType.ETF,
+    "股票": NodeType.STOCK,
+    "基金": NodeType.FUND,
+    "加密貨幣": NodeType.CRYPTO,
+    "其他": NodeType.OTHER,
+}
+
+# 根節點下可新增的標準分類（所有呼叫共用同一個 tuple）
+ROOT_CHILD_NAMES: tuple[str, ...] = tuple(_ROOT_ASSET_TYPES)
+
+
+@lru_cache(maxsize=None)
+def _available_child_names(node_type: NodeType, is_root: bool) -> tuple[str, ...]:
+    """依節點型別快取可新增子節點的名稱（registry 資料在載入後即固定）"""
+    if is_root:
+        return ROOT_CHILD_NAMES
+    available_node_types = hierarchy_manager.get_valid_child_types(node_type)
+    if not available_node_types:
+        return ()
+    if len(available_node_types) == 1 and next(
+        iter(available_node_types)
+    ).name.endswith("_SYMBOL"):
+        available_names = asset_registry.get_symbol_names(node_type)
+    else:
+        available_names = asset_registry.get_available_names(available_node_types)
+    return tuple(available_names) + ("其他",)
+
+
+@lru_cache(maxsize=None)
+def _symbol_name_set(parent_type: NodeType) -> frozenset[str]:
+    """依父節點型別快取標的名稱集合，供成員檢查用"""
+    return frozenset(asset_registry.get_symbol_names(parent_type))
+
 
 class Node:
+    # 節點數量可觀，以 __slots__ 省去每個實例的 __dict__
+    __slots__ = (
+        "name",
+        "node_type",
+        "children",
+        "allocation_group",
+        "parent_node",
+        "_full_path_cache",
+        "_valid_child_types",
+        "_sorted_names",
+    )
+
     def __init__(self, name: str, node_type: NodeType) -> None:
-        self.name = name
+        # intern 讓重複名稱（圖表標籤、dict 鍵）共用同一字串物件
+        self.name = intern(name)
         self.node_type = node_type
         self.children: dict[str, Node] = {}
         self.allocation_group = AllocationGroup()
         self.parent_node: Optional[Node] = None
+        self._full_path_cache: Optional[str] = None
+        self._valid_child_types: Optional[frozenset[NodeType]] = None
+        self._sorted_names: Optional[list[str]] = None
 
     @property
     def is_root(self) -> bool:
@@ -24,12 +82,14 @@ class Node:
 
     @property
     def full_path(self) -> str:
-        """返回從根節點開始的完整路徑（用 ' -> ' 分隔）"""
-        return (
-            self.name
-            if not self.parent_node
-            else f"{self.parent_node.full_path} -> {self.name}"
-        )
+        """返回從根節點開始的完整路徑（用 ' -> ' 分隔），結果會被快取"""
+        if self._full_path_cache is None:
+            self._full_path_cache = (
+                self.name
+                if not self.parent_node
+                else f"{self.parent_node.full_path} -> {self.name}"
+            )
+        return self._full_path_cache
 
     @property
     def has_children(self) -> bool:
@@ -39,22 +99,11 @@ class Node:
     def can_have_children(self) -> bool:
         return hierarchy_manager.can_have_children(self.node_type)
 
-    def get_available_child_names(self) -> list[str]:
-        """返回可新增子節點的名稱列表"""
+    def get_available_child_names(self) -> tuple[str, ...]:
+        """返回可新增子節點的名稱列表（同型別節點共用快取結果）"""
         if not self.can_have_children:
-            return []
-        if self.is_root:
-            return ["現金", "ETF", "股票", "基金", "加密貨幣", "其他"]
-        available_node_types = self.get_valid_child_types()
-        if not available_node_types:
-            return []
-        if len(available_node_types) == 1 and next(
-            iter(available_node_types)
-        ).name.endswith("_SYMBOL"):
-            available_names = asset_registry.get_symbol_names(self.node_type)
-        else:
-            available_names = asset_registry.get_available_names(available_node_types)
-        return available_names + ["其他"]
+            return ()
+        return _available_child_names(self.node_type, self.is_root)
 
     def determine_child_type(self, child_name: str) -> Optional[NodeType]:
         """根據輸入名稱推導子節點型別"""
@@ -62,21 +111,13 @@ class Node:
         if not valid_types:
             return None
         if self.is_root:
-            root_asset_types = {
-                "現金": NodeType.CASH,
-                "ETF": NodeType.ETF,
-                "股票": NodeType.STOCK,
-                "基金": NodeType.FUND,
-                "加密貨幣": NodeType.CRYPTO,
-                "其他": NodeType.OTHER,
-            }
-            node_type = root_asset_types.get(child_name, NodeType.OTHER)
+            node_type = _ROOT_ASSET_TYPES.get(child_name, NodeType.OTHER)
             return node_type if node_type in valid_types else None
         symbol_type = NodeType.get_symbol_type(self.node_type)
         if symbol_type and symbol_type in valid_types:
             if (
                 child_name == "其他"
-                or child_name not in asset_registry.get_symbol_names(self.node_type)
+                or child_name not in _symbol_name_set(self.node_type)
             ):
                 return symbol_type
         return asset_registry.get_name_type(child_name, valid_types)
@@ -95,7 +136,10 @@ class Node:
             return None, "不支援此節點類型"
         new_node = Node(cleaned_name, node_type)
         new_node.parent_node = self
+        new_node._full_path_cache = None  # 父節點確定後路徑才有效
         self.children[cleaned_name] = new_node
+        if self._sorted_names is not None:
+            insort(self._sorted_names, cleaned_name)
         self._initialize_child_allocation(cleaned_name, parent_weight)
         return new_node, ""
 
@@ -106,10 +150,7 @@ class Node:
         if len(self.children) == 1:
             self.allocation_group.update_allocation(name, parent_weight)
             return
-        unfixed_total = 100.0 - sum(
-            self.allocation_group.allocations[n]
-            for n in self.allocation_group.fixed_items
-        )
+        unfixed_total = 100.0 - self.allocation_group.fixed_total
         unfixed_count = len(self.children) - len(self.allocation_group.fixed_items)
         if unfixed_count > 0:
             share = unfixed_total / unfixed_count
@@ -117,17 +158,40 @@ class Node:
         else:
             self.allocation_group.update_allocation(name, 0)
 
+    def sorted_child_names(self) -> list[str]:
+        """返回排序後的子節點名稱；結果會快取並隨新增/移除增量維護"""
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self.children)
+        return self._sorted_names
+
+    def get_effective_allocation(self, name: str) -> float:
+        """取得子項目的有效比例；未設定或為 0 時退回平均分配"""
+        allocation = self.allocation_group.allocations.get(name)
+        if allocation is None or allocation == 0:
+            children_count = len(self.children)
+            allocation = 100.0 / children_count if children_count else 0.0
+        return allocation
+
     def remove_child(self, name: str) -> bool:
         """移除子節點，並更新配置比例"""
-        if name not in self.children:
+        # 以單次 pop 取代「in 檢查 + del」的兩次雜湊查找
+        removed = self.children.pop(name, _MISSING)
+        if removed is _MISSING:
             return False
-        del self.children[name]
-        if self.allocation_group:
-            if name in self.allocation_group.allocations:
-                del self.allocation_group.allocations[name]
-            if name in self.allocation_group.fixed_items:
-                self.allocation_group.fixed_items.remove(name)
+        if self._sorted_names is not None:
+            self._sorted_names.pop(bisect_left(self._sorted_names, name))
+        group = self.allocation_group
+        if group:
+            allocation = group.allocations.pop(name, 0.0)
+            fixed_count = len(group.fixed_items)
+            group.fixed_items.discard(name)
+            if len(group.fixed_items) != fixed_count:
+                group.fixed_total -= allocation
         return True
 
-    def get_valid_child_types(self) -> set[NodeType]:
-        return hierarchy_manager.get_valid_child_types(self.node_type)
+    def get_valid_child_types(self) -> frozenset[NodeType]:
+        if self._valid_child_types is None:
+            self._valid_child_types = hierarchy_manager.get_valid_child_types(
+                self.node_type
+            )
+        return self._valid_child_types
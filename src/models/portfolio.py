@@ -1,3 +1,4 @@
+from array import array
 from typing import Optional
 
 from .enums import NodeType
@@ -12,15 +13,94 @@ class PortfolioState:
     def __init__(self) -> None:
         # 建立根節點
         self.root = Node("投資組合", NodeType.PORTFOLIO)
+        # 樹或配置變動時設為 True，讓 UI 層知道快取的圖表資料已失效
+        self.sankey_dirty = True
+        # arena：整棵樹攤平成平行陣列，走訪時只做整數索引、不經過 dict。
+        # 變動後延遲重建（見 ensure_arena）。
+        self.arena_nodes: list[Node] = []
+        self.arena_parents: array = array("i")
+        self.arena_allocs: array = array("d")
+        self.arena_first_child: array = array("i")
+        self.arena_num_children: array = array("i")
+        self._arena_dirty = True
+        self._content_hash: Optional[int] = None
+
+    def _mark_dirty(self) -> None:
+        """標記樹狀結構或配置已變動，使各層快取延遲重建"""
+        self.sankey_dirty = True
+        self._arena_dirty = True
+        self._content_hash = None
+
+    def content_hash(self) -> int:
+        """
+        組合內容（結構與配置）的雜湊值，內容不變時維持不變，
+        供 UI 層作為 st.cache_data 的快取鍵；結果會快取到下次變動。
+        """
+        if self._content_hash is None:
+            self.ensure_arena()
+            self._content_hash = hash(
+                (
+                    tuple(node.name for node in self.arena_nodes),
+                    tuple(self.arena_parents),
+                    tuple(self.arena_allocs),
+                )
+            )
+        return self._content_hash
+
+    def ensure_arena(self) -> None:
+        """確保 arena 與 dict 樹同步；僅在有變動時重建"""
+        if self._arena_dirty:
+            self._rebuild_arena()
+            self._arena_dirty = False
+
+    def _rebuild_arena(self) -> None:
+        """
+        將 dict 樹攤平成 arena：節點依 BFS 逐層排列，
+        同一節點的子節點在 arena 中連續，
+        以 first_child + num_children 直接定位、無需另存子節點索引表。
+        逐層順序也保證 parent 索引小於子節點索引。
+        """
+        nodes: list[Node] = [self.root]
+        parents = array("i", [-1])
+        allocs = array("d", [100.0])
+        first_child = array("i")
+        num_children = array("i")
+        head = 0
+        while head < len(nodes):
+            current = nodes[head]
+            children_map = current.children
+            first_child.append(len(nodes))
+            num_children.append(len(children_map))
+            alloc_map = current.allocation_group.allocations
+            if len(alloc_map) == len(children_map):
+                # allocations 與 children 同步增減、順序一致（見 AllocationGroup），
+                # 兩邊平行走訪即可，省去逐名稱的字串雜湊查找
+                for child, alloc in zip(children_map.values(), alloc_map.values()):
+                    nodes.append(child)
+                    parents.append(head)
+                    allocs.append(alloc)
+            else:
+                for child in children_map.values():
+                    nodes.append(child)
+                    parents.append(head)
+                    allocs.append(alloc_map.get(child.name, 0.0))
+            head += 1
+
+        self.arena_nodes = nodes
+        self.arena_parents = parents
+        self.arena_allocs = allocs
+        self.arena_first_child = first_child
+        self.arena_num_children = num_children
 
     def get_node_by_path(self, path: list[str]) -> Optional[Node]:
         """根據路徑逐層查找節點，找不到返回 None"""
         current = self.root
         remaining = path[1:] if path and path[0] == current.name else path
         for name in remaining:
-            if name not in current.children:
+            next_node = current.children.get(name)
+            if next_node is None:
                 return None
-            current = current.children[name]
+            current = next_node
         return current
 
     def remove_asset(self, path: list[str]) -> bool:
@@ -37,6 +117,7 @@ class PortfolioState:
                 share = 100.0 / len(remaining)
                 for n in remaining:
                     parent.allocation_group.update_allocation(n, share)
+            self._mark_dirty()
             return True
         return False
 
@@ -45,6 +126,7 @@ class PortfolioState:
         if current := self.get_node_by_path(path):
             if current.allocation_group:
                 current.allocation_group.toggle_fixed(name, is_locked)
+                self._mark_dirty()
 
     def get_allocation(self, path: list[str], name: str) -> float:
         """取得指定資產的配置比例"""
@@ -59,12 +141,9 @@ class PortfolioState:
         return False
 
     def get_all_nodes(self) -> list[Node]:
-        def collect(node: Node) -> list[Node]:
-            return list(node.children.values()) + [
-                child for n in node.children.values() for child in collect(n)
-            ]
-
-        return collect(self.root)
+        """返回根節點以外的所有節點（依 arena 的逐層順序）"""
+        self.ensure_arena()
+        return self.arena_nodes[1:]
 
     def add_simplified_node(self, path: list[str], name: str) -> tuple[bool, str]:
         """
@@ -80,8 +159,36 @@ class PortfolioState:
         child_node, error_msg = current.add_child(name, parent_weight)
         if not child_node:
             return False, error_msg
+        self._mark_dirty()
         return True, ""
 
+    def precompute_weights(self) -> dict[tuple[str, ...], float]:
+        """
+        一次走訪算出每個節點的整體配置比例，
+        鍵為不含根節點的路徑 tuple（與 get_total_weight 的語意一致），
+        供 UI 層以查表取代逐項的根節點走訪。
+        """
+        self.ensure_arena()
+        nodes = self.arena_nodes
+        parents = self.arena_parents
+        total = len(nodes)
+        paths: list[tuple[str, ...]] = [()] * total
+        node_weights = [100.0] * total
+        weights: dict[tuple[str, ...], float] = {(): 100.0}
+        for i in range(1, total):
+            parent_idx = parents[i]
+            name = nodes[i].name
+            path = paths[parent_idx] + (name,)
+            weight = (
+                node_weights[parent_idx]
+                * nodes[parent_idx].get_effective_allocation(name)
+                / 100.0
+            )
+            paths[i] = path
+            node_weights[i] = weight
+            weights[path] = weight
+        return weights
+
     def get_total_weight(self, path: list[str]) -> float:
         if path and path[0] == self.root.name:
             path = path[1:]
@@ -90,11 +197,7 @@ class PortfolioState:
         current = self.root
         for name in path:
             # 若目前層級未設定 allocation，則使用平均比例分配
-            allocation = current.allocation_group.allocations.get(name)
-            if allocation is None or allocation == 0:
-                children_count = len(current.children)
-                allocation = 100.0 / children_count if children_count else 0.0
-            total = total * allocation / 100.0
+            total = total * current.get_effective_allocation(name) / 100.0
             next_node = current.children.get(name)
             if next_node is None:
                 break
@@ -106,3 +209,4 @@ class PortfolioState:
         if current := self.get_node_by_path(path):
             if current.allocation_group:
                 current.allocation_group.update_allocation(name, value)
+                self._mark_dirty()
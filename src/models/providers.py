@@ -1,6 +1,6 @@
 import io
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AbstractSet, Optional
 
 import pandas as pd
 import requests
@@ -198,7 +198,9 @@ class AssetNameRegistry:
             provider = AssetDataProviderFactory.create_provider(node_type)
             self._asset_type_map[node_type] = provider.get_symbols()
 
-    def get_available_names(self, available_types: set[NodeType]) -> list[str]:
+    def get_available_names(
+        self, available_types: AbstractSet[NodeType]
+    ) -> list[str]:
         available_names = []
         for node_type in available_types:
             if node_type in self._asset_type_map:
@@ -206,7 +208,7 @@ class AssetNameRegistry:
         return sorted(set(available_names))
 
     def get_name_type(
-        self, name: str, valid_types: set[NodeType]
+        self, name: str, valid_types: AbstractSet[NodeType]
     ) -> Optional[NodeType]:
         for node_type in valid_types:
             if (
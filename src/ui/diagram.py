@@ -1,9 +1,16 @@
+from typing import Optional
+
+import numpy as np
 import plotly.graph_objects as go  # type: ignore
 import streamlit as st
 
+try:  # numba 為選用的加速器，環境沒有時退回純 Python 迴圈
+    from numba import njit  # type: ignore
+except ImportError:
+    njit = None
+
 from ..models.enums import get_color
 from ..models.hierarchy import hierarchy_manager
-from ..models.node import Node
 from ..models.portfolio import PortfolioState
 
 """
@@ -12,45 +19,97 @@ Sankey 圖表模組：生成並顯示資產配置視覺化圖表。
 
 
 class SankeyChart:
-    def __init__(self) -> None:
-        self.source_indices: list[int] = []
-        self.target_indices: list[int] = []
-        self.flow_values: list[float] = []
-        self.node_labels: list[str] = []
-        self.node_colors: list[str] = []
+    __slots__ = (
+        "source_indices",
+        "target_indices",
+        "flow_values",
+        "node_labels",
+        "node_colors",
+    )
 
+    def __init__(self, node_count: int = 0) -> None:
+        # 每個非根節點恰對應一條連線，依節點數一次配置到位
+        # （Plotly 可直接接受 ndarray，無需轉回 list）
+        link_count = max(node_count - 1, 0)
+        self.source_indices: np.ndarray = np.zeros(link_count, dtype=np.int32)
+        self.target_indices: np.ndarray = np.zeros(link_count, dtype=np.int32)
+        self.flow_values: np.ndarray = np.zeros(link_count, dtype=np.float64)
+        self.node_labels: list[str] = [""] * node_count
+        self.node_colors: list[str] = [""] * node_count
 
-def create_sankey_chart(node: Node) -> SankeyChart:
+
+def create_sankey_chart(portfolio_state: PortfolioState) -> SankeyChart:
     """
-    根據資產節點生成 Sankey 圖數據。
+    根據 portfolio_state 的 arena 生成 Sankey 圖數據。
+    樹已攤平成平行陣列，這裡只剩一次線性掃描。
     """
-    chart = SankeyChart()
-    node_stack = [(node, -1, 100.0)]  # (目前節點, 父節點索引, 累計權重)
-
-    while node_stack:
-        current, parent_idx, current_weight = node_stack.pop()
-        current_idx = len(chart.node_labels)
-        chart.node_labels.append(current.name)
-        chart.node_colors.append(get_color(current.node_type))
-
-        if parent_idx != -1:
-            chart.flow_values.append(current_weight)
-            chart.source_indices.append(parent_idx)
-            chart.target_indices.append(current_idx)
-
-        # 將子節點（依排序）推入堆疊處理
-        for child in reversed(list(current.children.values())):
-            child_local_allocation = current.allocation_group.get_allocation(
-                child.name, 0.0
-            )
-            child_weight = current_weight * child_local_allocation / 100.0
-            node_stack.append((child, current_idx, child_weight))
+    portfolio_state.ensure_arena()
+    arena_nodes = portfolio_state.arena_nodes
+    total = len(arena_nodes)
+    chart = SankeyChart(total)
+
+    # 先把迴圈內會重複解析的屬性綁定成區域變數，
+    # 省去 CPython 每圈的屬性查找
+    node_labels = chart.node_labels
+    node_colors = chart.node_colors
+    get_color_local = get_color
+
+    for idx, current in enumerate(arena_nodes):
+        node_labels[idx] = current.name
+        node_colors[idx] = get_color_local(current.node_type)
+
+    # arena 為逐層排列，parent 索引必小於子節點索引，
+    # 依此拓撲順序把區域比例一路累乘成整體權重
+    parent_indices = np.frombuffer(portfolio_state.arena_parents, dtype=np.int32)
+    local_allocs = np.frombuffer(portfolio_state.arena_allocs, dtype=np.float64)
+    weights = _propagate_weights(parent_indices, local_allocs)
+
+    if total > 1:
+        chart.flow_values[:] = weights[1:]
+        chart.source_indices[:] = parent_indices[1:]
+        chart.target_indices[:] = np.arange(1, total, dtype=np.int32)
 
     return chart
 
 
+def _propagate_weights(
+    parent_indices: np.ndarray, local_allocs: np.ndarray
+) -> np.ndarray:
+    """依拓撲順序（父索引必小於子節點索引）將區域配置比例累乘為整體權重"""
+    total = local_allocs.shape[0]
+    weights = np.empty(total, dtype=np.float64)
+    weights[0] = 100.0
+    for i in range(1, total):
+        weights[i] = weights[parent_indices[i]] * local_allocs[i] * 0.01
+    return weights
+
+
+if njit is not None:
+    # 迴圈只有整數索引與浮點乘法，可直接編成機器碼；
+    # 首次呼叫的編譯結果會以 cache=True 存檔重用
+    _propagate_weights = njit(cache=True)(_propagate_weights)
+
+
+# 版面設定固定不變，模組載入時先經過一次 Plotly 驗證，
+# 之後每張圖直接沿用、不再逐屬性重新驗證
+_SANKEY_TITLE = "投資組合分析圖"
+_SANKEY_LAYOUT = go.Layout(
+    title=dict(
+        text=_SANKEY_TITLE,
+        font=dict(size=20, color="#FF4B4B"),
+        x=0.5,
+        xanchor="center",
+    ),
+    font=dict(size=12, family="Microsoft JhengHei"),
+    height=600,
+    margin=dict(l=50, r=50, t=50, b=50),
+    paper_bgcolor="rgba(0, 0, 0, 0)",
+    plot_bgcolor="rgba(0, 0, 0, 0)",
+)
+
+
 def create_sankey_figure(
-    chart: SankeyChart, title: str = "投資組合分析圖"
+    chart: SankeyChart, title: str = _SANKEY_TITLE
 ) -> go.Figure:
     """
     根據 SankeyChart 數據生成 Plotly Figure。
@@ -75,21 +134,45 @@ def create_sankey_figure(
                     hovertemplate="%{source.label} ➡ %{target.label}<br />比例: %{value:.2f}%<extra></extra>",
                 ),
             )
-        ]
-    )
-    fig.update_layout(
-        title=dict(
-            text=title, font=dict(size=20, color="#FF4B4B"), x=0.5, xanchor="center"
-        ),
-        font=dict(size=12, family="Microsoft JhengHei"),
-        height=600,
-        margin=dict(l=50, r=50, t=50, b=50),
-        paper_bgcolor="rgba(0, 0, 0, 0)",
-        plot_bgcolor="rgba(0, 0, 0, 0)",
+        ],
+        layout=_SANKEY_LAYOUT,
     )
+    if title != _SANKEY_TITLE:
+        fig.update_layout(title_text=title)
     return fig
 
 
+def _get_cached_sankey_chart(portfolio_state: PortfolioState) -> SankeyChart:
+    """
+    取得 Sankey 圖數據；組合未變動時直接沿用上次建好的結果，
+    避免每次 Streamlit rerun 都重建整棵樹的陣列。
+    除了 dirty flag，也比對內容雜湊值，
+    確保快取不會誤用到不同組合內容的結果。
+    """
+    content_hash = portfolio_state.content_hash()
+    cached: Optional[tuple[int, SankeyChart]] = st.session_state.get(
+        "sankey_chart_cache"
+    )
+    if (
+        cached is not None
+        and not portfolio_state.sankey_dirty
+        and cached[0] == content_hash
+    ):
+        return cached[1]
+    chart = create_sankey_chart(portfolio_state)
+    st.session_state["sankey_chart_cache"] = (content_hash, chart)
+    portfolio_state.sankey_dirty = False
+    return chart
+
+
+@st.cache_data(show_spinner=False)
+def _cached_weights(
+    content_hash: int, _portfolio_state: PortfolioState
+) -> dict[tuple[str, ...], float]:
+    """以內容雜湊值為鍵快取整體權重表；內容未變動時不重新走訪"""
+    return _portfolio_state.precompute_weights()
+
+
 def render_diagram(portfolio_state: PortfolioState) -> None:
     """
     根據 portfolio_state 資料顯示 Sankey 圖及配置細節。
@@ -101,50 +184,95 @@ def render_diagram(portfolio_state: PortfolioState) -> None:
     st.markdown(
         '<h2 style="color:#1E90FF;">📈 投資組合概覽</h2>', unsafe_allow_html=True
     )
-    _render_asset_summary(portfolio_state)
+    # 整體權重一次算齊，後續各區塊查表即可；
+    # 內容沒變的 rerun（例如只動了無關的 widget）直接命中快取
+    weights = _cached_weights(portfolio_state.content_hash(), portfolio_state)
+    _render_asset_summary(portfolio_state, weights)
 
     st.markdown('<h2 style="color:#1E90FF;">🔄 資金分配圖</h2>', unsafe_allow_html=True)
-    sankey_chart = create_sankey_chart(portfolio_state.root)
+    sankey_chart = _get_cached_sankey_chart(portfolio_state)
 
     with st.expander("🔎 詳情", expanded=False):
         st.write("節點數量:", len(sankey_chart.node_labels))
         st.write("連接數量:", len(sankey_chart.flow_values))
         st.write("節點標籤:", sankey_chart.node_labels)
-        st.write("連線數值:", sankey_chart.flow_values)
+        st.write("連線數值:", list(sankey_chart.flow_values))
 
     st.plotly_chart(create_sankey_figure(sankey_chart), use_container_width=True)
 
 
-def _render_asset_summary(portfolio_state: PortfolioState) -> None:
+def _render_asset_summary(
+    portfolio_state: PortfolioState, weights: dict[tuple[str, ...], float]
+) -> None:
     for asset_type in hierarchy_manager.get_sorted_children(portfolio_state.root):
         node = portfolio_state.root.children.get(asset_type)
         if node:
             allocation = portfolio_state.get_allocation([], asset_type)
             with st.expander(f"{asset_type} （配置比例：{allocation:.2f}%）"):
                 if node.has_children:
-                    _render_asset_type_details(portfolio_state, asset_type)
+                    _render_asset_type_details(portfolio_state, asset_type, weights)
                 else:
                     st.info(f"目前尚無 {asset_type} 相關項目，請至管理介面新增。")
 
 
-def _render_asset_type_details(
-    portfolio_state: PortfolioState, asset_type: str
-) -> None:
+def _asset_type_snapshot(
+    portfolio_state: PortfolioState,
+    asset_type: str,
+    weights: dict[tuple[str, ...], float],
+) -> tuple:
+    """
+    將單一資產類別子樹整理成可雜湊的巢狀 tuple
+    （名稱、局部比例、整體比例），整體比例由預先算好的
+    權重表查出，不再逐項從根節點重新走訪。
+    """
     node = portfolio_state.root.children[asset_type]
-    for sub_name, sub_node in sorted(node.children.items()):
-        sub_allocation = portfolio_state.get_allocation([asset_type], sub_name)
-        total_weight = portfolio_state.get_total_weight([asset_type, sub_name])
-        st.write(
-            f"  - {sub_name}：局部配置比例 {sub_allocation:.2f}% (整體配置比例 {total_weight:.2f}%)"
+    rows = []
+    for sub_name in node.sorted_child_names():
+        sub_node = node.children[sub_name]
+        sub_allocation = node.allocation_group.allocations.get(sub_name, 0.0)
+        sub_weight = weights[(asset_type, sub_name)]
+        children = tuple(
+            (
+                child_name,
+                sub_node.allocation_group.allocations.get(child_name, 0.0),
+                weights[(asset_type, sub_name, child_name)],
+            )
+            for child_name in sub_node.sorted_child_names()
         )
-        if sub_node.has_children:
-            for child_name in sorted(sub_node.children):
-                child_allocation = portfolio_state.get_allocation(
-                    [asset_type, sub_name], child_name
-                )
-                child_weight = portfolio_state.get_total_weight(
-                    [asset_type, sub_name, child_name]
-                )
-                st.write(
-                    f"    - {child_name}：局部配置 {child_allocation:.2f}% (整體配置 {child_weight:.2f}%)"
-                )
+        rows.append((sub_name, sub_allocation, sub_weight, children))
+    return tuple(rows)
+
+
+@st.cache_data(show_spinner=False)
+def _compute_asset_rows(
+    content_hash: int,
+    asset_type: str,
+    _portfolio_state: PortfolioState,
+    _weights: dict[tuple[str, ...], float],
+) -> list[str]:
+    """組出單一資產類別的顯示文字；組合內容未變動時直接命中快取"""
+    snapshot = _asset_type_snapshot(_portfolio_state, asset_type, _weights)
+    rows = []
+    for sub_name, sub_allocation, sub_weight, children in snapshot:
+        rows.append(
+            f"  - {sub_name}：局部配置比例 {sub_allocation:.2f}% (整體配置比例 {sub_weight:.2f}%)"
+        )
+        for child_name, child_allocation, child_weight in children:
+            rows.append(
+                f"    - {child_name}：局部配置 {child_allocation:.2f}% (整體配置 {child_weight:.2f}%)"
+            )
+    return rows
+
+
+def _render_asset_type_details(
+    portfolio_state: PortfolioState,
+    asset_type: str,
+    weights: dict[tuple[str, ...], float],
+) -> None:
+    rows = _compute_asset_rows(
+        portfolio_state.content_hash(), asset_type, portfolio_state, weights
+    )
+    # 整個清單合併成一個 Markdown 區塊輸出，
+    # 以單一元素取代逐列的 st.write 往返
+    if rows:
+        st.markdown("\n".join(rows))
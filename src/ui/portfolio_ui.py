@@ -68,7 +68,7 @@ def _update_share_allocation(portfolio_state: PortfolioState, path: list[str]) -
 
     # 先暫時解除固定狀態
     for name in fixed_items:
-        current.allocation_group.toggle_fixed(name, False)
+        portfolio_state.toggle_fixed(path, name, False)
 
     share_values: dict[str, float] = {}
     total_shares: float = 0.0
@@ -94,7 +94,7 @@ def _update_share_allocation(portfolio_state: PortfolioState, path: list[str]) -
     # 恢復固定項目
     for name, allocation in fixed_allocations.items():
         portfolio_state.update_allocation(path, name, allocation)
-        current.allocation_group.toggle_fixed(name, True)
+        portfolio_state.toggle_fixed(path, name, True)
 
 
 def _render_asset_item(
@@ -62,14 +62,15 @@ def render_rebalancer_ui(portfolio_state: PortfolioState) -> None:
 
         st.subheader("📝 資產調整建議")
 
-        # 建立資料表
+        # 建立資料表；整體權重一次算齊後查表，不逐項走訪
+        weights = portfolio_state.precompute_weights()
         rebalance_data = []
         for node in terminal_nodes:
             path_list = node.full_path.split(" -> ")
             # 提取標的名稱僅用最後一段，資產種類用第二段（若存在）
             asset_symbol = path_list[-1]
             asset_type = path_list[1] if len(path_list) > 1 else ""
-            weight = portfolio_state.get_total_weight(path_list)
+            weight = weights.get(tuple(path_list[1:]), 0.0)
             current_value = current_values[node.full_path]
             target_value = int(total_value * (weight / 100))
             diff = target_value - current_value